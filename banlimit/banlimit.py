@@ -15,8 +15,9 @@ from ratelimit.utils import (
     _ACCESSOR_KEYS,
     _PERIODS,
     _SIMPLE_KEYS,
+    _make_cache_key,
+    _method_match,
     _split_rate,
-    is_ratelimited,
 )
 
 from . import ALL
@@ -31,6 +32,32 @@ __all__ = ['banlimit']
 #     return utils_get_ip(request)
 
 
+class _CacheName:
+    """
+    Name of the django cache used by banlimit. Reads the RATELIMIT_USE_CACHE setting on every access, unless a cache
+    was passed to the decorator, so that it can be changed with override_settings.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is not None and instance.cache_override is not None:
+            return instance.cache_override
+        return getattr(settings, 'RATELIMIT_USE_CACHE', 'default')
+
+
+class _Cache:
+    """
+    Resolves the cache on use instead of at import time, so that importing this module neither touches the django
+    settings nor opens a backend connection.
+    django.core.cache.caches keeps one backend instance per alias and thread, so the lookup is thread-safe and reuses
+    the same connection on every call.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return caches[owner.cache_name]
+        return caches[instance.cache_name]
+
+
 class banlimit:
     """
     This class based decorator provides improvement over the existing django-ratelimit library- allowing the banning
@@ -63,21 +90,31 @@ class banlimit:
 
     block – False, True
             Whether to block the request instead of annotating.
+
+    cache – None, 'default'
+            Name of the django cache to store the ban state and request counts in. Defaults to the
+            RATELIMIT_USE_CACHE setting, which is read on every call so that it can be changed with override_settings.
+
+    cost – 1
+            Weight of a request, added to the request count of the current window. Also accepts a callable of
+            (group, request) returning an integer, e.g. the number of items of a batch request.
     """
 
     EXPIRATION_FUDGE = 5  # Extend the ban_cache_key expiration time by a few seconds to avoid misses.
     ban_re = re.compile('(\d*)([a-z])')
-    cache_name = getattr(settings, 'RATELIMIT_USE_CACHE', 'default')
-    cache = caches[cache_name]
-
+    # Both also work on the class, e.g. banlimit.cache.clear() uses the RATELIMIT_USE_CACHE cache.
+    cache_name = _CacheName()
+    cache = _Cache()
 
-    def __init__(self, key, rate, ban, group=None, method=ALL, block=True):
+    def __init__(self, key, rate, ban, group=None, method=ALL, block=True, cache=None, cost=1):
         self.group = group
         self.key = key
         self.rate = rate
         self.method = method
         self.block = block
         self.ban = ban
+        self.cache_override = cache
+        self.cost = cost
 
     def get_key_value(self, group=None, request=None):
         """
@@ -113,6 +150,41 @@ class banlimit:
             raise ImproperlyConfigured
         return int(vals[0]) * _PERIODS[period]
 
+    def _extract_cost(self, cost, group=None, request=None):
+        """Returns the weight of the request."""
+        if callable(cost):
+            cost = cost(group, request)
+        if isinstance(cost, bool) or not isinstance(cost, int) or cost < 0:
+            raise ImproperlyConfigured('Ratelimit cost must be a non-negative integer: %r' % (cost,))
+        return cost
+
+    def get_usage_count(self, group, rate, key_value, cost):
+        """
+        Adds the cost of the request to the count of the current window and returns the new count.
+        This has been adapted from ratelimit.utils.get_usage_count() to increment by more than one in a single
+        atomic incr.
+        """
+        period = _split_rate(rate)[1]
+        cache_key = _make_cache_key(group, rate, key_value, self.method)
+        timeout = period + self.EXPIRATION_FUDGE
+        cache = self.cache
+        if cache.add(cache_key, cost, timeout):
+            return cost
+        try:
+            return cache.incr(cache_key, cost)
+        except ValueError:
+            # The key is gone, e.g. the cache backend is unavailable. Count the request alone, as ratelimit does.
+            return cost
+
+    def is_ratelimited(self, request, group, rate, key_value, cost):
+        if not _method_match(request, self.method):
+            return False
+        limit = _split_rate(rate)[0]
+        count = self.get_usage_count(group, rate, key_value, cost)
+        limited = count > limit
+        request.limited = request.limited or limited
+        return limited
+
     def get_group(self, fn):
         group_local = self.group
         if group_local is None:
@@ -180,10 +252,9 @@ class banlimit:
             if banned and self.block:
                 raise Ratelimited
 
-            # Checks if the user is ratelimited.
-            ratelimited = is_ratelimited(request=request, group=self.group, fn=fn,
-                                         key=self.key, rate=self.rate, method=self.method,
-                                         increment=True)
+            # Checks if the user is ratelimited, counting the request by its cost.
+            cost = self._extract_cost(self.cost, group_local, request)
+            ratelimited = self.is_ratelimited(request, group_local, rate_local, key_value, cost)
 
             if ratelimited:
                 self.cache.add(ban_cache_key, ban_duration, ban_duration + self.EXPIRATION_FUDGE)
@@ -192,7 +263,8 @@ class banlimit:
                     exception.banlimit_data = {
                         "key": self.key,
                         "key_value": key_value,
-                        "ban_duration": ban_duration
+                        "ban_duration": ban_duration,
+                        "cost": cost
                     }
                     # Raise Ratelimited exception with details about banned entity.
                     raise exception
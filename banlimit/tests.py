@@ -1,9 +1,15 @@
+import os
+import subprocess
+import sys
 import time
+from unittest import mock
 
 from django.core.cache import (
     InvalidCacheBackendError,
     cache,
+    caches,
 )
+from django.core.exceptions import ImproperlyConfigured
 from django.test import RequestFactory, TestCase
 from django.test.utils import override_settings
 from django.views.generic import View
@@ -25,6 +31,20 @@ def mykey(group, request):
     return request.META['REMOTE_ADDR'][::-1]
 
 
+# Imports banlimit with every cache lookup failing, and checks that the settings were never loaded.
+IMPORT_CHECK = '''
+from django.conf import settings
+from django.core.cache import CacheHandler
+
+def fail(self, alias):
+    raise AssertionError('Cache %s was looked up at import time.' % alias)
+
+CacheHandler.__getitem__ = fail
+import banlimit.banlimit
+assert not settings.configured, 'Settings were loaded at import time.'
+'''
+
+
 class BanlimitTests(TestCase):
     def setUp(self):
         cache.clear()
@@ -257,6 +277,35 @@ class BanlimitTests(TestCase):
         with self.assertRaises(InvalidCacheBackendError):
             view(req)
 
+    def test_cache_override(self):
+        """The cache argument takes precedence over the RATELIMIT_USE_CACHE setting."""
+
+        limiter = banlimit(key='ip', ban='60s', rate='1/m', cache='default')
+        with override_settings(RATELIMIT_USE_CACHE='fake-cache'):
+            assert limiter.cache is caches['default']
+
+    def test_lazy_cache(self):
+        """The cache is resolved on use, so that override_settings applies to existing decorators."""
+        limiter = banlimit(key='ip', ban='60s', rate='1/m')
+        assert limiter.cache is caches['default']
+        with override_settings(RATELIMIT_USE_CACHE='fake-cache'):
+            with self.assertRaises(InvalidCacheBackendError):
+                limiter.cache
+
+    def test_class_cache(self):
+        """The cache can still be reached on the class."""
+        assert banlimit.cache_name == 'default'
+        assert banlimit.cache is caches['default']
+        with override_settings(RATELIMIT_USE_CACHE='fake-cache'):
+            assert banlimit.cache_name == 'fake-cache'
+
+    def test_import_without_settings(self):
+        """Importing the module must neither load the settings nor look up a cache."""
+        env = dict(os.environ)
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.check_call([sys.executable, '-c', IMPORT_CHECK], env=env, cwd=root)
+
     def test_user_or_ip(self):
         """Allow custom functions to set cache keys."""
 
@@ -369,6 +418,89 @@ class BanlimitTests(TestCase):
         time.sleep(10)
         assert view(req)
 
+    def test_cost(self):
+        @banlimit(key='ip', rate='5/m', ban='60s', cost=2, block=False)
+        def view(request):
+            return request.limited
+
+        req = rf.post('/')
+        assert not view(req), 'First request counts 2.'
+        del req.limited
+        assert not view(req), 'Second request counts 4.'
+        del req.limited
+        assert view(req), 'Third request counts 6 and is limited.'
+
+    def test_callable_cost(self):
+        def get_cost(group, request):
+            return int(request.POST['items'])
+
+        @banlimit(key='ip', rate='10/m', ban='60s', cost=get_cost, block=True)
+        def view(request):
+            return True
+
+        assert view(rf.post('/', {'items': '1'}))
+        assert view(rf.post('/', {'items': '9'}))
+        with self.assertRaises(Ratelimited) as context:
+            view(rf.post('/', {'items': '3'}))
+        assert context.exception.banlimit_data['cost'] == 3
+
+    def test_bulk_cost_exceeds_rate(self):
+        @banlimit(key='ip', rate='10/m', ban='60s', cost=lambda g, r: 1000, block=False)
+        def view(request):
+            return request.limited
+
+        assert view(rf.post('/')), 'A single request above the rate is limited.'
+
+    def test_bad_cost(self):
+        @banlimit(key='ip', rate='10/m', ban='60s', cost=-1, block=False)
+        def view(request):
+            return request.limited
+
+        with self.assertRaises(ImproperlyConfigured):
+            view(rf.post('/'))
+
+        @banlimit(key='ip', rate='10/m', ban='60s', cost=lambda g, r: True, block=False)
+        def bool_cost(request):
+            return request.limited
+
+        with self.assertRaises(ImproperlyConfigured):
+            bool_cost(rf.post('/'))
+
+        @banlimit(key='ip', rate='10/m', ban='60s', cost=lambda g, r: '2', block=False)
+        def str_cost(request):
+            return request.limited
+
+        with self.assertRaises(ImproperlyConfigured):
+            str_cost(rf.post('/'))
+
+    def test_cost_not_computed_when_banned(self):
+        def get_cost(group, request):
+            if request.POST.get('bad'):
+                raise AssertionError('The cost of a banned request must not be computed.')
+            return 1
+
+        @banlimit(key='ip', rate='1/m', ban='60s', cost=get_cost, block=True)
+        def view(request):
+            return True
+
+        assert view(rf.post('/'))
+        with self.assertRaises(Ratelimited):
+            view(rf.post('/'))
+        with self.assertRaises(Ratelimited):
+            view(rf.post('/', {'bad': '1'}))
+
+    def test_cache_unavailable(self):
+        """A failing counter counts the request alone, as ratelimit does."""
+
+        @banlimit(key='ip', rate='10/m', ban='60s', block=False)
+        def view(request):
+            return request.limited
+
+        view(rf.post('/'))
+        with mock.patch.object(caches['default'], 'incr', side_effect=ValueError), \
+                mock.patch.object(caches['default'], 'add', return_value=False):
+            assert not view(rf.post('/'))
+
     def test_method_decorator(self):
         class TestView(View):
             @banlimit(key='ip', rate='1/m', ban='60s', block=False)